@@ -47,6 +47,7 @@ pub fn run_with<S: Simulation + 'static>(sim: S, config: SimulationConfig) -> an
         renderer: Option<Renderer>,
         simulation: S,
         last_frame: Instant,
+        frame: u64,
         config: SimulationConfig,
     }
 
@@ -122,7 +123,14 @@ pub fn run_with<S: Simulation + 'static>(sim: S, config: SimulationConfig) -> an
                     renderer.resize(new_size);
                 }
                 WindowEvent::RedrawRequested => {
-                    log::info!("FPS: {}", 1.0 / (self.last_frame.elapsed().as_secs_f32()));
+                    let now = Instant::now();
+                    let dt = (now - self.last_frame).as_secs_f32();
+
+                    self.frame += 1;
+
+                    if self.frame % self.config.fps == 0 {
+                        log::info!("FPS: {}", 1.0 / dt);
+                    }
 
                     let PhysicalSize { width, height } = window.inner_size();
 
@@ -130,8 +138,6 @@ pub fn run_with<S: Simulation + 'static>(sim: S, config: SimulationConfig) -> an
                         return;
                     }
 
-                    let now = Instant::now();
-                    let dt = (now - self.last_frame).as_secs_f32();
                     let bounds = Bounds {
                         width: width as f32,
                         height: height as f32,
@@ -186,6 +192,7 @@ pub fn run_with<S: Simulation + 'static>(sim: S, config: SimulationConfig) -> an
         renderer: None,
         simulation: sim,
         last_frame: Instant::now(),
+        frame: 0,
         config,
     };
 
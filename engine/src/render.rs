@@ -29,6 +29,7 @@ pub struct Renderer {
     globals_bg: BindGroup,
 
     instance_buffer: Buffer,
+    instances: Vec<InstanceRaw>,
     num_instances: usize,
 }
 
@@ -201,6 +202,7 @@ impl Renderer {
             globals_bg,
 
             instance_buffer,
+            instances: Vec::new(),
             num_instances: 0,
         })
     }
@@ -222,15 +224,17 @@ impl Renderer {
     pub fn upload_instances(&mut self, particles: &[Particle]) {
         self.num_instances = particles.len().min(MAX_INSTANCES);
 
-        let data = particles
-            .iter()
-            .map(InstanceRaw::from_particle)
-            .collect::<Vec<InstanceRaw>>();
+        self.instances.clear();
+        self.instances.extend(
+            particles[..self.num_instances]
+                .iter()
+                .map(InstanceRaw::from_particle),
+        );
 
         self.queue.write_buffer(
             &self.instance_buffer,
             0,
-            bytemuck::cast_slice(&data[..self.num_instances]),
+            bytemuck::cast_slice(&self.instances),
         );
     }
 
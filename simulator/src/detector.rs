@@ -1,4 +1,5 @@
 use engine::{Bounds, particle::Particle};
+use glam::Vec2;
 
 use crate::{
     solver::{Collision, Toi},
@@ -6,6 +7,17 @@ use crate::{
 };
 
 pub trait Detector {
+    /// Whether `find_min_toi` queries the grid's cells, so the solver can
+    /// skip rebuilding them.
+    fn uses_cells(&self) -> bool {
+        true
+    }
+
+    /// Whether `find_min_toi` reads `SpatialGrid::sweeps`.
+    fn uses_sweeps(&self) -> bool {
+        false
+    }
+
     fn find_min_toi(
         &mut self,
         grid: &mut SpatialGrid,
@@ -19,6 +31,22 @@ pub struct CellListDetector;
 pub struct TccdDetector;
 pub struct SweptAabbDetector;
 
+#[derive(Default)]
+pub struct SweepPruneDetector {
+    order: Vec<usize>,
+}
+
+impl GridQuery for CellListDetector {
+    fn candidates(
+        grid: &mut SpatialGrid,
+        particles: &[Particle],
+        i: usize,
+        _dt: f32,
+    ) -> impl Iterator<Item = usize> {
+        grid.cell_list(&particles[i])
+    }
+}
+
 impl Detector for CellListDetector {
     fn find_min_toi(
         &mut self,
@@ -27,33 +55,69 @@ impl Detector for CellListDetector {
         bounds: &Bounds,
         dt: f32,
     ) -> Option<Toi> {
-        let mut min_toi = None;
+        scan_candidates::<Self>(grid, particles, bounds, dt)
+    }
+}
 
-        for (i, p) in particles.iter().enumerate() {
-            for j in grid.cell_list(p) {
-                if j <= i {
-                    continue;
-                }
+impl GridQuery for TccdDetector {
+    fn candidates(
+        grid: &mut SpatialGrid,
+        particles: &[Particle],
+        i: usize,
+        dt: f32,
+    ) -> impl Iterator<Item = usize> {
+        grid.candidates_along_sweep_with_radius(particles, i, dt)
+    }
+}
 
-                if let Some(t) = p2p_toi(p, &particles[j], dt)
-                    && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
-                {
-                    min_toi = Some(Toi::from((t, Collision::Pair(i, j))));
-                }
-            }
+impl Detector for TccdDetector {
+    fn find_min_toi(
+        &mut self,
+        grid: &mut SpatialGrid,
+        particles: &[Particle],
+        bounds: &Bounds,
+        dt: f32,
+    ) -> Option<Toi> {
+        scan_candidates::<Self>(grid, particles, bounds, dt)
+    }
+}
 
-            if let Some(t) = boundary_toi(p, bounds, dt)
-                && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
-            {
-                min_toi = Some(Toi::from((t, Collision::Wall(i))));
-            }
-        }
+impl GridQuery for SweptAabbDetector {
+    fn candidates(
+        grid: &mut SpatialGrid,
+        _particles: &[Particle],
+        i: usize,
+        _dt: f32,
+    ) -> impl Iterator<Item = usize> {
+        grid.candidates_swept_aabb(i)
+    }
+}
 
-        min_toi
+impl Detector for SweptAabbDetector {
+    fn uses_sweeps(&self) -> bool {
+        true
+    }
+
+    fn find_min_toi(
+        &mut self,
+        grid: &mut SpatialGrid,
+        particles: &[Particle],
+        bounds: &Bounds,
+        dt: f32,
+    ) -> Option<Toi> {
+        scan_candidates::<Self>(grid, particles, bounds, dt)
     }
 }
 
-impl Detector for TccdDetector {
+impl Detector for SweepPruneDetector {
+    fn uses_cells(&self) -> bool {
+        false
+    }
+
+    fn uses_sweeps(&self) -> bool {
+        true
+    }
+
     fn find_min_toi(
         &mut self,
         grid: &mut SpatialGrid,
@@ -62,21 +126,42 @@ impl Detector for TccdDetector {
         dt: f32,
     ) -> Option<Toi> {
         let mut min_toi = None;
+        let sweeps = grid.sweeps();
 
-        for (i, p1) in particles.iter().enumerate() {
-            for j in grid.candidates_along_sweep_with_radius(particles, i, dt) {
-                if j <= i {
+        self.order.clear();
+        self.order.extend(0..particles.len());
+        self.order
+            .sort_unstable_by(|&a, &b| sweeps[a].0.x.total_cmp(&sweeps[b].0.x));
+
+        for (k, &a) in self.order.iter().enumerate() {
+            let (a_min, a_max) = sweeps[a];
+
+            for &b in &self.order[k + 1..] {
+                let (b_min, b_max) = sweeps[b];
+
+                if b_min.x > a_max.x {
+                    break;
+                }
+
+                if b_min.y > a_max.y || b_max.y < a_min.y {
                     continue;
                 }
 
-                if let Some(t) = p2p_toi(p1, &particles[j], dt)
+                let (i, j) = if a < b { (a, b) } else { (b, a) };
+                let horizon = min_toi.map_or(dt, |toi: Toi| toi.time);
+
+                if let Some(t) = p2p_toi(&particles[i], &particles[j], horizon)
                     && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
                 {
                     min_toi = Some(Toi::from((t, Collision::Pair(i, j))));
                 }
             }
+        }
 
-            if let Some(t) = boundary_toi(p1, bounds, dt)
+        for (i, p) in particles.iter().enumerate() {
+            let horizon = min_toi.map_or(dt, |toi: Toi| toi.time);
+
+            if let Some(t) = boundary_toi(p, bounds, horizon)
                 && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
             {
                 min_toi = Some(Toi::from((t, Collision::Wall(i))));
@@ -87,38 +172,51 @@ impl Detector for TccdDetector {
     }
 }
 
-impl Detector for SweptAabbDetector {
-    fn find_min_toi(
-        &mut self,
+/// Where a grid-backed detector gets particle `i`'s candidates from.
+trait GridQuery {
+    fn candidates(
         grid: &mut SpatialGrid,
         particles: &[Particle],
-        bounds: &Bounds,
+        i: usize,
         dt: f32,
-    ) -> Option<Toi> {
-        let mut min_toi = None;
-
-        for (i, p1) in particles.iter().enumerate() {
-            for j in grid.candidates_swept_aabb(particles, i, dt) {
-                if j <= i {
-                    continue;
-                }
+    ) -> impl Iterator<Item = usize>;
+}
 
-                if let Some(t) = p2p_toi(p1, &particles[j], dt)
-                    && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
-                {
-                    min_toi = Some(Toi::from((t, Collision::Pair(i, j))));
-                }
+// Generic over the query so each grid detector gets its own copy with the
+// query inlined.
+fn scan_candidates<Q: GridQuery>(
+    grid: &mut SpatialGrid,
+    particles: &[Particle],
+    bounds: &Bounds,
+    dt: f32,
+) -> Option<Toi> {
+    let mut min_toi = None;
+
+    for (i, p1) in particles.iter().enumerate() {
+        for j in Q::candidates(grid, particles, i, dt) {
+            if j <= i {
+                continue;
             }
 
-            if let Some(t) = boundary_toi(p1, bounds, dt)
+            let horizon = min_toi.map_or(dt, |toi: Toi| toi.time);
+
+            if let Some(t) = p2p_toi(p1, &particles[j], horizon)
                 && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
             {
-                min_toi = Some(Toi::from((t, Collision::Wall(i))));
+                min_toi = Some(Toi::from((t, Collision::Pair(i, j))));
             }
         }
 
-        min_toi
+        let horizon = min_toi.map_or(dt, |toi: Toi| toi.time);
+
+        if let Some(t) = boundary_toi(p1, bounds, horizon)
+            && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
+        {
+            min_toi = Some(Toi::from((t, Collision::Wall(i))));
+        }
     }
+
+    min_toi
 }
 
 fn p2p_toi(p1: &Particle, p2: &Particle, dt: f32) -> Option<f32> {
@@ -126,6 +224,16 @@ fn p2p_toi(p1: &Particle, p2: &Particle, dt: f32) -> Option<f32> {
     let dv = p2.velocity - p1.velocity;
     let r = p1.radius + p2.radius;
 
+    // Per-axis reach over the step: if either gap is wider, skip the solve.
+    // The slack covers rounding in the solve, which can land a contact just
+    // past the exact reach
+    let slack = dp.abs().element_sum() * 1e-3;
+    let reach = Vec2::splat(r + slack) + dv.abs() * dt;
+
+    if dp.abs().cmpgt(reach).any() {
+        return None;
+    }
+
     let a = dv.dot(dv);
     let b = 2.0 * dp.dot(dv);
     let c = dp.dot(dp) - r * r;
@@ -148,6 +256,14 @@ fn p2p_toi(p1: &Particle, p2: &Particle, dt: f32) -> Option<f32> {
         return None;
     }
 
+    // t_min <= dt  <=>  -b - 2a * dt <= sqrt(disc), so compare squares first,
+    // with slack on the scale of b's rounding error
+    let reach_t = -b - 2.0 * a * dt;
+
+    if reach_t > 0.0 && reach_t * reach_t - disc > 1e-5 * b * b {
+        return None;
+    }
+
     let sqrt_d = disc.sqrt();
     let t_min = (-b - sqrt_d) / (2.0 * a);
 
@@ -201,3 +317,206 @@ fn boundary_toi(p: &Particle, bounds: &Bounds, dt: f32) -> Option<f32> {
         false => None,
     }
 }
+
+#[cfg(test)]
+mod tests {
+    use rand::{Rng, SeedableRng, rngs::StdRng};
+
+    use super::*;
+
+    const BOUNDS: Bounds = Bounds {
+        width: 800.0,
+        height: 600.0,
+    };
+
+    fn vec2(rng: &mut StdRng, extent: f32) -> Vec2 {
+        Vec2::new(
+            rng.random_range(-extent..extent),
+            rng.random_range(-extent..extent),
+        )
+    }
+
+    fn particle(position: Vec2, velocity: Vec2, radius: f32) -> Particle {
+        Particle::new(position, velocity, radius, radius * radius, [0.0; 3])
+    }
+
+    // The quadratic solve without any of the early-outs in `p2p_toi`
+    fn p2p_toi_unpruned(p1: &Particle, p2: &Particle, dt: f32) -> Option<f32> {
+        let dp = p2.position - p1.position;
+        let dv = p2.velocity - p1.velocity;
+        let r = p1.radius + p2.radius;
+
+        let a = dv.dot(dv);
+        let b = 2.0 * dp.dot(dv);
+        let c = dp.dot(dp) - r * r;
+
+        if c <= 0.0 || a <= 1e-12 || b >= 0.0 {
+            return None;
+        }
+
+        let disc = b * b - 4.0 * a * c;
+
+        if disc < 0.0 {
+            return None;
+        }
+
+        let t_min = (-b - disc.sqrt()) / (2.0 * a);
+
+        match t_min >= 0.0 && t_min <= dt {
+            true => Some(t_min),
+            false => None,
+        }
+    }
+
+    #[test]
+    fn p2p_toi_matches_unpruned_solve() {
+        let mut rng = StdRng::seed_from_u64(12);
+
+        for k in 0..500_000 {
+            let mut p1 = particle(
+                vec2(&mut rng, 60.0),
+                vec2(&mut rng, 600.0),
+                rng.random_range(3.0..7.0),
+            );
+            let mut p2 = particle(
+                vec2(&mut rng, 60.0),
+                vec2(&mut rng, 600.0),
+                rng.random_range(3.0..7.0),
+            );
+
+            // Head-on along an axis, where the per-axis reach test is tight
+            if k % 4 == 0 {
+                for p in [&mut p1, &mut p2] {
+                    p.position.y = 0.0;
+                    p.velocity.y = 0.0;
+                }
+            }
+
+            // Closest approach within rounding of touching, where the
+            // discriminant is almost zero
+            if k % 4 == 1 {
+                let dv = p2.velocity - p1.velocity;
+                let side = dv.perp().normalize() * (p1.radius + p2.radius);
+                let lead: f32 = rng.random_range(0.0..0.05);
+                let miss: f32 = rng.random_range(0.9999..1.0001);
+
+                p2.position = p1.position - dv * lead + side * miss;
+            }
+
+            let dt = rng.random_range(0.0..1.0 / 30.0);
+
+            assert_eq!(
+                p2p_toi(&p1, &p2, dt),
+                p2p_toi_unpruned(&p1, &p2, dt),
+                "{p1:?} {p2:?} dt={dt}"
+            );
+
+            // Horizons at the contact time and one ulp either side of it
+            if let Some(t) = p2p_toi_unpruned(&p1, &p2, f32::INFINITY) {
+                for dt in [t.next_down(), t, t.next_up()] {
+                    assert_eq!(
+                        p2p_toi(&p1, &p2, dt),
+                        p2p_toi_unpruned(&p1, &p2, dt),
+                        "{p1:?} {p2:?} dt={dt}"
+                    );
+                }
+            }
+        }
+    }
+
+    // Every pair and every wall, with no broad phase
+    fn min_toi_all_pairs(particles: &[Particle], bounds: &Bounds, dt: f32) -> Option<Toi> {
+        let mut min_toi = None;
+
+        for (i, p1) in particles.iter().enumerate() {
+            for (j, p2) in particles.iter().enumerate().skip(i + 1) {
+                if let Some(t) = p2p_toi_unpruned(p1, p2, dt)
+                    && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
+                {
+                    min_toi = Some(Toi::from((t, Collision::Pair(i, j))));
+                }
+            }
+
+            if let Some(t) = boundary_toi(p1, bounds, dt)
+                && !min_toi.is_some_and(|toi: Toi| t >= toi.time)
+            {
+                min_toi = Some(Toi::from((t, Collision::Wall(i))));
+            }
+        }
+
+        min_toi
+    }
+
+    fn frames(seed: u64) -> impl Iterator<Item = Vec<Particle>> {
+        let mut rng = StdRng::seed_from_u64(seed);
+
+        (0..200).map(move |_| {
+            (0..300)
+                .map(|_| {
+                    let position = Vec2::new(
+                        rng.random_range(-360.0..360.0),
+                        rng.random_range(-270.0..270.0),
+                    );
+
+                    particle(position, vec2(&mut rng, 500.0), rng.random_range(3.0..7.0))
+                })
+                .collect()
+        })
+    }
+
+    #[test]
+    fn sweep_prune_matches_all_pairs() {
+        let dt = 1.0 / 30.0;
+        let mut grid = SpatialGrid::new(20.0);
+        let mut sweep_prune = SweepPruneDetector::default();
+        let mut pairs = 0;
+
+        for particles in frames(19) {
+            grid.rebuild_sweeps(&particles, dt);
+
+            let expected = min_toi_all_pairs(&particles, &BOUNDS, dt);
+            let actual = sweep_prune.find_min_toi(&mut grid, &particles, &BOUNDS, dt);
+
+            assert_eq!(actual, expected);
+
+            if let Some(Toi {
+                collision: Collision::Pair(..),
+                ..
+            }) = expected
+            {
+                pairs += 1;
+            }
+        }
+
+        assert!(pairs > 0, "no pair contacts were compared");
+    }
+
+    // Swept AABB is not conservative: pair (i, j) is only tried from i's
+    // query, so it is missed when j starts outside i's padded box. It may
+    // report a later contact than the true first one, but never an earlier
+    // or a false one.
+    #[test]
+    fn swept_aabb_reports_only_real_contacts() {
+        let dt = 1.0 / 30.0;
+        let mut grid = SpatialGrid::new(20.0);
+
+        for particles in frames(23) {
+            grid.rebuild(&particles);
+            grid.rebuild_sweeps(&particles, dt);
+
+            let expected = min_toi_all_pairs(&particles, &BOUNDS, dt);
+            let Some(found) = SweptAabbDetector.find_min_toi(&mut grid, &particles, &BOUNDS, dt)
+            else {
+                continue;
+            };
+
+            let time = match found.collision {
+                Collision::Pair(i, j) => p2p_toi_unpruned(&particles[i], &particles[j], dt),
+                Collision::Wall(i) => boundary_toi(&particles[i], &BOUNDS, dt),
+            };
+
+            assert_eq!(time, Some(found.time));
+            assert!(expected.is_some_and(|toi| toi.time <= found.time));
+        }
+    }
+}
@@ -1,15 +1,25 @@
-use std::{fs::File, io::BufWriter};
+use std::{
+    fs::File,
+    sync::mpsc::{self, Receiver, SyncSender},
+    thread::{self, JoinHandle},
+};
 
 use clap::ValueEnum;
 use engine::particle::Particle;
 use serde::Serialize;
 
+const CSV_BUFFER_CAPACITY: usize = 1 << 20;
+// Up to two records a frame, so a few seconds of frames before send blocks
+const WRITER_QUEUE_CAPACITY: usize = 256;
+
 pub struct Recorder {
     pub frame: u64,
     pub time_s: f32,
 
-    particles_csv: Option<CsvSink>,
-    events_csv: Option<CsvSink>,
+    has_particles: bool,
+    has_events: bool,
+    events: Vec<EventRow>,
+    writer: Option<(SyncSender<Record>, JoinHandle<()>)>,
 }
 
 #[derive(Debug, Clone, Copy, ValueEnum)]
@@ -24,6 +34,7 @@ pub enum DetectionType {
     CellList,
     Tccd,
     SweptAabb,
+    SweepPrune,
 }
 
 impl DetectionType {
@@ -32,6 +43,7 @@ impl DetectionType {
             DetectionType::CellList => "cell_list",
             DetectionType::Tccd => "tccd",
             DetectionType::SweptAabb => "swept_aabb",
+            DetectionType::SweepPrune => "sweep_prune",
         }
     }
 
@@ -63,41 +75,65 @@ impl Recorder {
                 (p, e)
             }
         };
+
+        let has_particles = particles_csv.is_some();
+        let has_events = events_csv.is_some();
+        let writer = (has_particles || has_events).then(|| {
+            let (tx, rx) = mpsc::sync_channel(WRITER_QUEUE_CAPACITY);
+            let handle = thread::Builder::new()
+                .name("csv-writer".into())
+                .spawn(move || {
+                    CsvWriter {
+                        particles_csv,
+                        events_csv,
+                    }
+                    .run(rx)
+                })
+                .expect("spawn csv writer");
+
+            (tx, handle)
+        });
+
         Self {
             frame: 0,
             time_s: 0.0,
-            particles_csv,
-            events_csv,
+            has_particles,
+            has_events,
+            events: Vec::new(),
+            writer,
         }
     }
 
     pub fn write_particles_snapshot(&mut self, particles: &[Particle]) {
-        if let Some(pw) = &mut self.particles_csv {
-            for (i, p) in particles.iter().enumerate() {
-                if let Err(e) = pw.writer_mut().serialize(ParticleRow {
-                    frame: self.frame,
-                    time_s: self.time_s,
-                    particle_id: i,
-                    x: p.position.x,
-                    y: p.position.y,
-                    vx: p.velocity.x,
-                    vy: p.velocity.y,
-                    radius: p.radius,
-                    mass: p.mass,
-                }) {
-                    log::error!("Failed to write particle snapshot: {}", e);
-                    break;
-                }
-            }
+        if !self.has_particles {
+            return;
         }
+
+        let rows = particles
+            .iter()
+            .enumerate()
+            .map(|(i, p)| ParticleRow {
+                frame: self.frame,
+                time_s: self.time_s,
+                particle_id: i,
+                x: p.position.x,
+                y: p.position.y,
+                vx: p.velocity.x,
+                vy: p.velocity.y,
+                radius: p.radius,
+                mass: p.mass,
+            })
+            .collect();
+
+        self.send(Record::Particles(rows));
     }
 
     pub fn write_event_pair(
         &mut self,
         (toi, i, j, nx, ny, vrel_n_before, vrel_n_after): (f32, usize, usize, f32, f32, f32, f32),
     ) {
-        if let Some(ew) = &mut self.events_csv
-            && let Err(e) = ew.writer_mut().serialize(EventRow::Pair {
+        if self.has_events {
+            self.events.push(EventRow::Pair {
                 frame: self.frame,
                 time_s: self.time_s + toi,
                 toi,
@@ -107,9 +143,7 @@ impl Recorder {
                 ny,
                 vrel_n_before,
                 vrel_n_after,
-            })
-        {
-            log::error!("Failed to write pair event: {}", e);
+            });
         }
     }
 
@@ -117,8 +151,8 @@ impl Recorder {
         &mut self,
         (toi, i, wall, nx, ny, vn_before, vn_after): (f32, usize, &'static str, f32, f32, f32, f32),
     ) {
-        if let Some(ew) = &mut self.events_csv
-            && let Err(e) = ew.writer_mut().serialize(EventRow::Wall {
+        if self.has_events {
+            self.events.push(EventRow::Wall {
                 frame: self.frame,
                 time_s: self.time_s + toi,
                 toi,
@@ -128,32 +162,117 @@ impl Recorder {
                 ny,
                 vn_before,
                 vn_after,
-            })
-        {
-            log::error!("Failed to write wall event: {}", e);
+            });
         }
     }
 
     pub fn flush(&mut self) {
-        if self.frame % 60 == 0
-            && let (Some(pw), Some(ew)) = (&mut self.particles_csv, &mut self.events_csv)
+        self.send_events();
+
+        if self.frame % 60 == 0 {
+            self.send(Record::Flush);
+        }
+    }
+
+    fn send_events(&mut self) {
+        if !self.events.is_empty() {
+            let rows = std::mem::take(&mut self.events);
+            self.send(Record::Events(rows));
+        }
+    }
+
+    fn send(&self, record: Record) {
+        if let Some((tx, _)) = &self.writer
+            && tx.send(record).is_err()
         {
-            pw.flush();
-            ew.flush();
-        };
+            log::error!("CSV writer thread has stopped");
+        }
+    }
+}
+
+impl Drop for Recorder {
+    fn drop(&mut self) {
+        self.send_events();
+
+        if let Some((tx, handle)) = self.writer.take() {
+            drop(tx);
+
+            if handle.join().is_err() {
+                log::error!("CSV writer thread panicked");
+            }
+        }
+    }
+}
+
+enum Record {
+    Particles(Vec<ParticleRow>),
+    Events(Vec<EventRow>),
+    Flush,
+}
+
+struct CsvWriter {
+    particles_csv: Option<CsvSink>,
+    events_csv: Option<CsvSink>,
+}
+
+impl CsvWriter {
+    fn run(mut self, rx: Receiver<Record>) {
+        for record in rx {
+            match record {
+                Record::Particles(rows) => {
+                    if let Some(pw) = &mut self.particles_csv {
+                        for row in rows {
+                            if let Err(e) = pw.writer_mut().serialize(row) {
+                                log::error!("Failed to write particle snapshot: {}", e);
+                                break;
+                            }
+                        }
+                    }
+                }
+                Record::Events(rows) => {
+                    if let Some(ew) = &mut self.events_csv {
+                        for row in rows {
+                            if let Err(e) = ew.writer_mut().serialize(&row) {
+                                match row {
+                                    EventRow::Pair { .. } => {
+                                        log::error!("Failed to write pair event: {}", e)
+                                    }
+                                    EventRow::Wall { .. } => {
+                                        log::error!("Failed to write wall event: {}", e)
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+                Record::Flush => self.flush(),
+            }
+        }
+
+        self.flush();
+    }
+
+    fn flush(&mut self) {
+        for sink in [&mut self.particles_csv, &mut self.events_csv]
+            .into_iter()
+            .flatten()
+        {
+            sink.flush();
+        }
     }
 }
 
 pub struct CsvSink {
     name: String,
-    writer: csv::Writer<BufWriter<File>>,
+    writer: csv::Writer<File>,
 }
 
 impl CsvSink {
     fn new(path: String) -> Self {
         let file = File::create(&path).expect("create csv");
-        let buf = BufWriter::new(file);
-        let writer = csv::WriterBuilder::new().from_writer(buf);
+        let writer = csv::WriterBuilder::new()
+            .buffer_capacity(CSV_BUFFER_CAPACITY)
+            .from_writer(file);
 
         Self { name: path, writer }
     }
@@ -164,7 +283,7 @@ impl CsvSink {
         }
     }
 
-    fn writer_mut(&mut self) -> &mut csv::Writer<BufWriter<File>> {
+    fn writer_mut(&mut self) -> &mut csv::Writer<File> {
         &mut self.writer
     }
 }
@@ -2,7 +2,7 @@ use engine::{Bounds, particle::Particle};
 use glam::Vec2;
 
 use crate::{
-    detector::{CellListDetector, Detector, SweptAabbDetector, TccdDetector},
+    detector::{CellListDetector, Detector, SweepPruneDetector, SweptAabbDetector, TccdDetector},
     miscs::{DetectionType, Recorder, RecorderType},
     spatial::SpatialGrid,
 };
@@ -10,13 +10,13 @@ use crate::{
 const EPS_T: f32 = 1e-5;
 const MAX_ITER: usize = 100;
 
-#[derive(Debug, Clone, Copy)]
+#[derive(Debug, Clone, Copy, PartialEq)]
 pub enum Collision {
     Pair(usize, usize),
     Wall(usize),
 }
 
-#[derive(Debug, Clone, Copy)]
+#[derive(Debug, Clone, Copy, PartialEq)]
 pub struct Toi {
     pub time: f32,
     pub collision: Collision,
@@ -52,6 +52,7 @@ impl Solver {
                 DetectionType::CellList => Box::new(CellListDetector),
                 DetectionType::Tccd => Box::new(TccdDetector),
                 DetectionType::SweptAabb => Box::new(SweptAabbDetector),
+                DetectionType::SweepPrune => Box::new(SweepPruneDetector::default()),
             },
         }
     }
@@ -63,7 +64,13 @@ impl Solver {
                 break;
             }
 
-            self.grid.rebuild(particles);
+            if self.detector.uses_cells() {
+                self.grid.rebuild(particles);
+            }
+
+            if self.detector.uses_sweeps() {
+                self.grid.rebuild_sweeps(particles, dt);
+            }
 
             let min_toi = self
                 .detector
@@ -99,7 +106,7 @@ impl Solver {
                     return;
                 }
 
-                let n_hat = n / dist2.sqrt();
+                let n_hat = n * dist2.sqrt().recip();
                 let v_rel_n = (p2.velocity - p1.velocity).dot(n_hat);
 
                 if v_rel_n >= 0.0 {
@@ -107,10 +114,10 @@ impl Solver {
                 }
 
                 let (m1, m2) = (p1.mass, p2.mass);
-                let impulse = (2.0 * m1 * m2 / (m1 + m2)) * v_rel_n * n_hat;
+                let k = 2.0 * v_rel_n / (m1 + m2);
 
-                particles[i].velocity += impulse / m1;
-                particles[j].velocity -= impulse / m2;
+                particles[i].velocity += n_hat * (k * m2);
+                particles[j].velocity -= n_hat * (k * m1);
 
                 let v_rel_n_after = (particles[j].velocity - particles[i].velocity).dot(n_hat);
 
@@ -1,11 +1,21 @@
 use engine::particle::Particle;
 use glam::{IVec2, Vec2};
-use std::collections::HashMap;
+use std::{
+    collections::HashMap,
+    hash::{BuildHasherDefault, Hasher},
+};
+
+type CellMap<V> = HashMap<IVec2, V, BuildHasherDefault<CellHasher>>;
 
 pub struct SpatialGrid {
     cell_size: f32,
-    cells: HashMap<IVec2, Vec<usize>>,
+    cells: CellTable,
+    sweeps: Vec<(Vec2, Vec2)>,
     r_max: f32,
+
+    seen: Vec<u32>,
+    stamp: u32,
+    candidates: Vec<usize>,
 }
 
 impl SpatialGrid {
@@ -24,19 +34,44 @@ impl SpatialGrid {
     pub fn new(cell_size: f32) -> Self {
         Self {
             cell_size,
-            cells: HashMap::new(),
+            cells: CellTable::default(),
+            sweeps: Vec::new(),
             r_max: 0.0,
+
+            seen: Vec::new(),
+            stamp: 0,
+            candidates: Vec::new(),
         }
     }
 
     pub fn rebuild(&mut self, particles: &[Particle]) {
-        self.cells.clear();
+        self.cells.coords.clear();
 
-        for (i, p) in particles.iter().enumerate() {
+        for p in particles {
             let c = self.cell_coord(p.position);
 
-            self.cells.entry(c).or_default().push(i);
+            self.cells.coords.push(c);
         }
+
+        self.cells.rebuild();
+    }
+
+    pub fn rebuild_sweeps(&mut self, particles: &[Particle], dt: f32) {
+        self.sweeps.clear();
+
+        for p in particles {
+            let end = p.position + p.velocity * dt;
+            let r = Vec2::splat(p.radius);
+
+            self.sweeps
+                .push((p.position.min(end) - r, p.position.max(end) + r));
+        }
+    }
+
+    /// Each particle's AABB over the `dt` given to the last `rebuild_sweeps`,
+    /// padded by its own radius.
+    pub fn sweeps(&self) -> &[(Vec2, Vec2)] {
+        &self.sweeps
     }
 
     pub fn cell_list<'a>(&'a self, p: &Particle) -> impl Iterator<Item = usize> + 'a {
@@ -44,19 +79,20 @@ impl SpatialGrid {
 
         Self::DIRS.into_iter().flat_map(move |d| {
             let c = base + d;
-            self.cells.get(&c).into_iter().flatten().copied()
+            self.cells
+                .get(&c)
+                .into_iter()
+                .flatten()
+                .map(|&j| j as usize)
         })
     }
 
     pub fn candidates_along_sweep_with_radius<'a>(
-        &'a self,
-        particles: &'a [Particle],
+        &'a mut self,
+        particles: &[Particle],
         i: usize,
         dt: f32,
     ) -> impl Iterator<Item = usize> + 'a {
-        use glam::{IVec2, Vec2};
-        use std::collections::{HashSet, VecDeque};
-
         let p = &particles[i];
         let dir: Vec2 = p.velocity;
         let ray = GridRayIter::new(p.position, dir, dt, self.cell_size);
@@ -64,14 +100,17 @@ impl SpatialGrid {
         let kf = ((p.radius + self.r_max) / self.cell_size).ceil().max(1.0);
         let k = kf as i32;
 
-        let mut seen = HashSet::<usize>::new();
-        let mut out = VecDeque::<usize>::new();
+        self.begin_query(particles.len());
 
-        let push_cell = |c: IVec2, out: &mut VecDeque<usize>, seen: &mut HashSet<usize>| {
+        let stamp = self.stamp;
+        let push_cell = |c: IVec2, out: &mut Vec<usize>, seen: &mut [u32]| {
             if let Some(list) = self.cells.get(&c) {
                 for &j in list {
-                    if j != i && seen.insert(j) {
-                        out.push_back(j);
+                    let j = j as usize;
+
+                    if j != i && seen[j] != stamp {
+                        seen[j] = stamp;
+                        out.push(j);
                     }
                 }
             }
@@ -80,50 +119,59 @@ impl SpatialGrid {
         for c in ray {
             for dy in -k..=k {
                 for dx in -k..=k {
-                    push_cell(IVec2::new(c.x + dx, c.y + dy), &mut out, &mut seen);
+                    push_cell(
+                        IVec2::new(c.x + dx, c.y + dy),
+                        &mut self.candidates,
+                        &mut self.seen,
+                    );
                 }
             }
         }
 
-        out.into_iter()
+        self.candidates.iter().copied()
     }
 
-    pub fn candidates_swept_aabb<'a>(
-        &'a self,
-        particles: &'a [Particle],
-        i: usize,
-        dt: f32,
-    ) -> impl Iterator<Item = usize> + 'a {
-        use glam::{IVec2, Vec2};
-        use std::collections::{HashSet, VecDeque};
-
-        let p = &particles[i];
-        let p1 = p.position;
-        let p2 = p.position + p.velocity * dt;
-
-        let r = p.radius + self.r_max;
-        let mins = p1.min(p2) - Vec2::splat(r);
-        let maxs = p1.max(p2) + Vec2::splat(r);
+    pub fn candidates_swept_aabb(&mut self, i: usize) -> impl Iterator<Item = usize> + '_ {
+        let (mins, maxs) = self.sweeps[i];
+        let r = Vec2::splat(self.r_max);
 
-        let cmin = self.cell_coord(mins);
-        let cmax = self.cell_coord(maxs);
+        let cmin = self.cell_coord(mins - r);
+        let cmax = self.cell_coord(maxs + r);
 
-        let mut seen = HashSet::new();
-        let mut out = VecDeque::new();
+        self.begin_query(self.sweeps.len());
 
         for cy in cmin.y..=cmax.y {
             for cx in cmin.x..=cmax.x {
                 if let Some(list) = self.cells.get(&IVec2::new(cx, cy)) {
                     for &j in list {
-                        if j != i && seen.insert(j) {
-                            out.push_back(j);
+                        let j = j as usize;
+
+                        if j != i && self.seen[j] != self.stamp {
+                            self.seen[j] = self.stamp;
+                            self.candidates.push(j);
                         }
                     }
                 }
             }
         }
 
-        out.into_iter()
+        self.candidates.iter().copied()
+    }
+
+    /// Starts a new dedup generation, so `seen` never needs clearing between
+    /// queries.
+    fn begin_query(&mut self, n: usize) {
+        self.candidates.clear();
+        self.stamp = self.stamp.wrapping_add(1);
+
+        if self.stamp == 0 {
+            self.seen.fill(0);
+            self.stamp = 1;
+        }
+
+        if self.seen.len() < n {
+            self.seen.resize(n, 0);
+        }
     }
 
     #[inline]
@@ -135,6 +183,87 @@ impl SpatialGrid {
     }
 }
 
+/// Cell membership in compressed form: one flat `members` array, with each
+/// occupied cell mapping to its `(start, len)` slice of it.
+#[derive(Default)]
+struct CellTable {
+    ranges: CellMap<(u32, u32)>,
+    members: Vec<u32>,
+    coords: Vec<IVec2>,
+}
+
+impl CellTable {
+    /// Count-then-fill over `coords`, so no per-cell lists are allocated.
+    fn rebuild(&mut self) {
+        self.ranges.clear();
+
+        for &c in &self.coords {
+            self.ranges.entry(c).or_default().1 += 1;
+        }
+
+        let mut start = 0;
+
+        for range in self.ranges.values_mut() {
+            let len = range.1;
+
+            *range = (start, 0);
+            start += len;
+        }
+
+        self.members.clear();
+        self.members.resize(self.coords.len(), 0);
+
+        for (i, c) in self.coords.iter().enumerate() {
+            if let Some(range) = self.ranges.get_mut(c) {
+                self.members[(range.0 + range.1) as usize] = i as u32;
+                range.1 += 1;
+            }
+        }
+    }
+
+    #[inline]
+    fn get(&self, c: &IVec2) -> Option<&[u32]> {
+        self.ranges
+            .get(c)
+            .map(|&(start, len)| &self.members[start as usize..(start + len) as usize])
+    }
+}
+
+/// Spatial hash for cell coordinates: `(x * p1) ^ (y * p2)`, as used for
+/// uniform-grid broad phases. Much cheaper than SipHash on the hot lookups.
+#[derive(Default)]
+struct CellHasher {
+    hash: u64,
+    lane: usize,
+}
+
+impl CellHasher {
+    const PRIMES: [u64; 2] = [73_856_093, 19_349_663];
+    const SPREAD: u64 = 0x9e37_79b9_7f4a_7c15;
+}
+
+impl Hasher for CellHasher {
+    fn write(&mut self, bytes: &[u8]) {
+        for &b in bytes {
+            self.hash = (self.hash.rotate_left(5) ^ b as u64).wrapping_mul(Self::SPREAD);
+        }
+    }
+
+    #[inline]
+    fn write_i32(&mut self, i: i32) {
+        self.hash ^= (i as u32 as u64).wrapping_mul(Self::PRIMES[self.lane & 1]);
+        self.lane += 1;
+    }
+
+    #[inline]
+    fn finish(&self) -> u64 {
+        // Buckets come from the low bits, so fold the mixed high half back down
+        let h = self.hash.wrapping_mul(Self::SPREAD);
+
+        h ^ (h >> 32)
+    }
+}
+
 struct GridRayIter {
     cur: IVec2,
     step: IVec2,